@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Mide el tiempo de arranque del cliente y de los módulos del proyecto.
+
+Cada medición se hace en un intérprete nuevo para que no influya la caché de
+módulos. Además de la importación de cada módulo se mide:
+
+- primer_prompt: desde el inicio hasta la primera llamada a input() del cliente,
+  incluyendo Chat() y Chat.run(), con la sesión MCP sustituida por una falsa.
+- precarga: Chat() más la precarga completa en segundo plano y el primer acceso
+  a la colección de ChromaDB.
+
+Uso: python bench_startup.py [repeticiones] [escenario ...]
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+IMPORTACION = """
+import time
+t0 = time.perf_counter()
+import {modulo}
+print(time.perf_counter() - t0)
+"""
+
+# Sesión MCP falsa: solo interesa el tiempo hasta que se muestra el prompt
+PRIMER_PROMPT = """
+import time
+t0 = time.perf_counter()
+# asyncio también lo importa el cliente, así que entra en la medición
+import asyncio, builtins, sys, types
+
+class _Sesion:
+    def __init__(self, *args):
+        pass
+    async def __aenter__(self):
+        return self
+    async def __aexit__(self, *args):
+        return False
+    async def initialize(self):
+        pass
+
+class _Conexion(_Sesion):
+    async def __aenter__(self):
+        return (None, None)
+
+mcp = types.ModuleType("mcp")
+mcp.ClientSession = _Sesion
+mcp.StdioServerParameters = lambda **kwargs: kwargs
+stdio = types.ModuleType("mcp.client.stdio")
+stdio.stdio_client = lambda params: _Conexion()
+sys.modules.update({"mcp": mcp, "mcp.client": types.ModuleType("mcp.client"), "mcp.client.stdio": stdio})
+
+def _input(prompt=""):
+    print(time.perf_counter() - t0)
+    sys.exit(0)
+
+builtins.input = _input
+
+import mcp_cliente_correoresumen
+asyncio.run(mcp_cliente_correoresumen.Chat().run())
+"""
+
+PRECARGA = """
+import time
+t0 = time.perf_counter()
+import mcp_cliente_correoresumen
+chat = mcp_cliente_correoresumen.Chat()
+chat.warmup().join()
+chat.collection
+print(time.perf_counter() - t0)
+"""
+
+ESCENARIOS = {
+    "mcp_cliente_correoresumen": IMPORTACION.format(modulo="mcp_cliente_correoresumen"),
+    "resumenmensaje": IMPORTACION.format(modulo="resumenmensaje"),
+    "conectar_gmail": IMPORTACION.format(modulo="conectar_gmail"),
+    "primer_prompt": PRIMER_PROMPT,
+    "precarga": PRECARGA,
+}
+
+
+def medir(codigo: str, repeticiones: int) -> list[float]:
+    """Devuelve los tiempos de un escenario en segundos"""
+    tiempos = []
+    for _ in range(repeticiones):
+        proceso = subprocess.run(
+            [sys.executable, "-c", codigo],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+        )
+        if proceso.returncode != 0:
+            error = proceso.stderr.strip().splitlines()
+            raise RuntimeError(error[-1] if error else f"código {proceso.returncode}")
+        tiempos.append(float(proceso.stdout.strip().splitlines()[-1]))
+    return tiempos
+
+
+def main():
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    escenarios = sys.argv[2:] or list(ESCENARIOS)
+
+    print(f"{'Escenario':<30} {'Mediana (ms)':>12} {'Mínimo (ms)':>12}")
+    print("-" * 56)
+    for escenario in escenarios:
+        try:
+            tiempos = medir(ESCENARIOS[escenario], repeticiones)
+        except Exception as e:
+            print(f"{escenario:<30} Error: {str(e)}")
+            continue
+        print(f"{escenario:<30} {statistics.median(tiempos) * 1000:>12.1f} {min(tiempos) * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -62,9 +62,17 @@ class GmailSender:
     def __init__(self, credentials_file='token.json'):
         """Inicializa el servicio de Gmail con las credenciales proporcionadas"""
         self.credentials_file = credentials_file
-        self.gmail_service = self._get_gmail_service()
+        # El servicio se construye en el primer envío (descubrimiento y OAuth son lentos)
+        self._gmail_service = None
         self.session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
 
+    @property
+    def gmail_service(self):
+        """Servicio de Gmail, construido en el primer acceso"""
+        if self._gmail_service is None:
+            self._gmail_service = self._get_gmail_service()
+        return self._gmail_service
+
     def _get_gmail_service(self):
         """Obtiene el servicio de Gmail usando las credenciales"""
         creds = None
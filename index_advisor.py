@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""Asesor de índices para las consultas ejecutadas por el servidor MCP.
+
+Registra la forma normalizada de cada consulta (sin literales), su plan
+(EXPLAIN QUERY PLAN) y su tiempo de ejecución en una base de datos de carga de
+trabajo separada, y a partir de ese registro propone índices ordenados por el
+ahorro estimado.
+"""
+import math
+import re
+import sqlite3
+from datetime import datetime
+
+from sql_utils import quote_identifier
+
+# Sentencias cuyo plan puede mejorar con un índice
+PLANNED_STATEMENTS = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+SQL_KEYWORDS = {
+    "where", "on", "join", "inner", "left", "right", "full", "cross", "outer",
+    "natural", "group", "order", "limit", "union", "using", "as", "set",
+}
+
+# Ejecuciones que se conservan; las más antiguas se descartan al registrar nuevas
+MAX_WORKLOAD_ROWS = 10000
+
+# Filas que se leen para estimar valores distintos cuando no hay sqlite_stat1
+SAMPLE_ROWS = 10000
+
+# Fracción de filas que SQLite supone que cumple un rango sin estadísticas
+RANGE_SELECTIVITY = 0.25
+
+# Por encima de esta fracción de la tabla, un índice no compensa frente al recorrido
+MAX_MATCH_SHARE = 0.25
+
+WORKLOAD_SCHEMA = """
+CREATE TABLE IF NOT EXISTS query_workload (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    shape TEXT NOT NULL,
+    plan TEXT NOT NULL,
+    elapsed_ms REAL NOT NULL,
+    executed_at TEXT NOT NULL
+)
+"""
+
+
+def init_workload_db(workload_path: str):
+    """Crea la tabla de carga de trabajo si no existe"""
+    conn = sqlite3.connect(workload_path)
+    try:
+        # El registro es desechable: WAL abarata cada escritura del camino de la petición
+        conn.execute("PRAGMA journal_mode = WAL")
+        # Las versiones anteriores guardaban el SQL con sus literales: se descarta ese registro
+        columns = [col[1] for col in conn.execute("PRAGMA table_info(query_workload)")]
+        if "sql" in columns:
+            conn.execute("DROP TABLE query_workload")
+        conn.execute(WORKLOAD_SCHEMA)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_query_workload_shape ON query_workload (shape)")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def normalize_query(sql: str) -> str:
+    """Reduce una consulta a su forma: sin literales, comentarios ni espacios extra"""
+    shape = re.sub(r"--[^\n]*|/\*.*?\*/", " ", sql, flags=re.S)
+    shape = re.sub(r"'(?:[^']|'')*'", "?", shape)
+    shape = re.sub(r"\b\d+(?:\.\d+)?\b", "?", shape)
+    shape = re.sub(r"\(\s*\?(?:\s*,\s*\?)*\s*\)", "(?)", shape)
+    shape = re.sub(r"\s+", " ", shape).strip().rstrip(";").strip()
+    return shape.lower()
+
+
+def explain_query(conn: sqlite3.Connection, sql: str) -> str:
+    """Devuelve el plan de la consulta, un paso por línea"""
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    return "\n".join(row[3] for row in rows)
+
+
+def record_query(workload_path: str, sql: str, plan: str, elapsed_ms: float):
+    """Guarda la forma de una consulta ejecutada y poda las ejecuciones más antiguas"""
+    conn = sqlite3.connect(workload_path)
+    try:
+        conn.execute("PRAGMA synchronous = OFF")
+        cursor = conn.execute(
+            "INSERT INTO query_workload (shape, plan, elapsed_ms, executed_at) VALUES (?, ?, ?, ?)",
+            (normalize_query(sql), plan, elapsed_ms, datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+        )
+        conn.execute("DELETE FROM query_workload WHERE id <= ?", (cursor.lastrowid - MAX_WORKLOAD_ROWS,))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _table_aliases(shape: str) -> dict:
+    """Relaciona alias y nombres de tabla de las cláusulas FROM/JOIN con la tabla real"""
+    aliases = {}
+    for table, alias in re.findall(r"\b(?:from|join)\s+(\w+)(?:\s+(?:as\s+)?(\w+))?", shape):
+        aliases[table] = table
+        if alias and alias not in SQL_KEYWORDS:
+            aliases[alias] = table
+    return aliases
+
+
+def _table_columns(conn: sqlite3.Connection, table: str) -> dict:
+    """Columnas de la tabla (en minúsculas -> nombre real), sin la clave primaria entera"""
+    columns = {}
+    for col in conn.execute(f"PRAGMA table_info({quote_identifier(table)})").fetchall():
+        if col[5] and col[2].upper() == "INTEGER":
+            continue
+        columns[col[1].lower()] = col[1]
+    return columns
+
+
+def _existing_indexes(conn: sqlite3.Connection, table: str) -> list:
+    """Pares (nombre, columnas en minúsculas) de los índices existentes de la tabla"""
+    indexes = []
+    for index in conn.execute(f"PRAGMA index_list({quote_identifier(table)})").fetchall():
+        info = conn.execute(f"PRAGMA index_info({quote_identifier(index[1])})").fetchall()
+        indexes.append((index[1], [col[2].lower() for col in info if col[2]]))
+    return indexes
+
+
+def _column_refs(clause: str, names: set, columns: dict, pattern: str) -> list:
+    """Columnas de la tabla referenciadas en una cláusula con el patrón dado"""
+    found = []
+    for qualifier, column in re.findall(pattern, clause):
+        if qualifier and qualifier not in names:
+            continue
+        if column in columns and column not in found:
+            found.append(column)
+    return found
+
+
+def _candidate_columns(shape: str, names: set, columns: dict, plan_step: str, sorts: bool):
+    """Columnas de un índice candidato para una tabla recorrida completa.
+
+    Devuelve (columnas de igualdad, columna de rango o None, columnas de ORDER BY).
+    """
+    # El propio planificador indica las columnas cuando crea un índice automático
+    automatic = re.search(r"AUTOMATIC (?:PARTIAL )?(?:COVERING )?INDEX \((.*)\)", plan_step)
+    if automatic:
+        terms = [(c.lower(), op) for c, op in re.findall(r"(\w+)\s*([=<>])", automatic.group(1))]
+        equality = [c for c, op in terms if op == "=" and c in columns]
+        ranges = [c for c, op in terms if op != "=" and c in columns]
+        return equality, ranges[0] if ranges else None, []
+
+    # Predicados de WHERE y ON: lo que va tras FROM (o tras el SET de un UPDATE)
+    # y antes de GROUP/ORDER BY o LIMIT
+    clause = re.split(r"\b(?:group by|order by|limit)\b", shape)[0]
+    clause = re.sub(r"^update\b.*?(?=\bwhere\b|$)", "", clause)
+    clause = clause.split(" from ", 1)[-1]
+    equality = _column_refs(clause, names, columns, r"(?:(\w+)\.)?(\w+)\s*(?:==|=(?!=)|\bin\b)")
+    ranges = _column_refs(clause, names, columns, r"(?:(\w+)\.)?(\w+)\s*(?:<=|>=|<(?!>)|>|\bbetween\b)")
+    ranges = [c for c in ranges if c not in equality]
+
+    sort = []
+    if not equality and not ranges and sorts:
+        order_by = re.search(r"\border by\b(.*?)(?:\blimit\b|$)", shape)
+        if order_by:
+            sort = _column_refs(order_by.group(1), names, columns, r"(?:(\w+)\.)?(\w+)")
+    return equality, ranges[0] if ranges else None, sort
+
+
+def _estimated_rows(conn: sqlite3.Connection, table: str) -> int:
+    """Filas estimadas de la tabla sin recorrerla: sqlite_stat1 (ANALYZE) o el mayor rowid"""
+    try:
+        stats = conn.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = ?", (table,)).fetchall()
+        if stats:
+            return max(int(stat[0].split()[0]) for stat in stats)
+    except sqlite3.OperationalError:
+        pass  # Todavía no se ha ejecutado ANALYZE
+    try:
+        return conn.execute(f"SELECT MAX(rowid) FROM {quote_identifier(table)}").fetchone()[0] or 0
+    except sqlite3.OperationalError:
+        return 0  # Tabla WITHOUT ROWID
+
+
+def _rows_per_key(conn: sqlite3.Connection, table: str, columns: list, indexes: list) -> float:
+    """Filas estimadas por cada combinación de valores de las columnas"""
+    wanted = {c.lower() for c in columns}
+    # Con ANALYZE, sqlite_stat1 guarda las filas por clave de cada prefijo de índice
+    for name, index_columns in indexes:
+        if set(index_columns[:len(columns)]) != wanted:
+            continue
+        try:
+            stat = conn.execute("SELECT stat FROM sqlite_stat1 WHERE idx = ?", (name,)).fetchone()
+            if stat:
+                return float(stat[0].split()[len(columns)])
+        except (sqlite3.OperationalError, IndexError, ValueError):
+            pass
+
+    # Sin estadísticas: valores distintos de una muestra acotada, extrapolados a la
+    # tabla con el estimador Duj1 (usa los valores que aparecen una sola vez)
+    selected = ", ".join(quote_identifier(c) for c in columns)
+    sampled, distinct, singletons = conn.execute(
+        f"WITH s AS (SELECT {selected} FROM {quote_identifier(table)} LIMIT ?), "
+        f"g AS (SELECT COUNT(*) AS n FROM s GROUP BY {selected}) "
+        "SELECT (SELECT COUNT(*) FROM s), (SELECT COUNT(*) FROM g), (SELECT COUNT(*) FROM g WHERE n = 1)",
+        (SAMPLE_ROWS,),
+    ).fetchone()
+    if not distinct:
+        return 1.0
+    table_rows = max(_estimated_rows(conn, table), sampled)
+    estimated_distinct = sampled * distinct / (sampled - singletons + singletons * sampled / table_rows)
+    return table_rows / estimated_distinct
+
+
+def _estimated_saving(executions: int, avg_ms: float, table_rows: int, matches: float) -> float:
+    """Ahorro estimado (ms): se pasa de recorrer N filas a una búsqueda ~log2(N) más las filas que cumplen"""
+    if table_rows <= 1:
+        return 0.0
+    index_cost = (math.log2(table_rows) + matches) / table_rows
+    return executions * avg_ms * max(0.0, 1 - index_cost)
+
+
+def suggest_indexes(db_path: str, workload_path: str, limit: int = 10) -> list:
+    """Propone índices a partir de la carga de trabajo registrada.
+
+    Devuelve una lista de diccionarios con table, columns, queries, saving_ms y sql,
+    ordenada por ahorro estimado descendente.
+    """
+    workload = sqlite3.connect(workload_path)
+    try:
+        # SQLite toma las columnas sueltas de la fila con MAX(id): el plan más reciente
+        shapes = workload.execute(
+            "SELECT shape, COUNT(*), AVG(elapsed_ms), plan, MAX(id) FROM query_workload GROUP BY shape"
+        ).fetchall()
+    finally:
+        workload.close()
+
+    conn = sqlite3.connect(db_path)
+    candidates = {}
+    try:
+        tables = {row[0].lower(): row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        row_counts = {}
+
+        for shape, executions, avg_ms, plan, _ in shapes:
+            parse_shape = re.sub(r'["`\[\]]', "", shape)
+            aliases = _table_aliases(parse_shape)
+            sorts = "USE TEMP B-TREE FOR ORDER BY" in plan
+
+            # Pasos costosos: recorridos completos e índices automáticos
+            steps = []
+            for step in plan.splitlines():
+                match = re.match(r"(SCAN|SEARCH) (?:TABLE )?(\w+)(?: AS (\w+))?(.*)$", step.strip())
+                if not match:
+                    continue
+                kind, name, alias, detail = match.groups()
+                if kind == "SEARCH" and "AUTOMATIC" not in detail:
+                    continue
+                if kind == "SCAN" and "INDEX" in detail:
+                    continue
+                steps.append((step, name, alias))
+
+            # En un JOIN el tiempo de la consulta se reparte entre sus pasos costosos
+            step_ms = avg_ms / len(steps) if steps else 0.0
+
+            for step, name, alias in steps:
+                table = tables.get(aliases.get((alias or name).lower(), name.lower()))
+                if not table:
+                    continue
+
+                columns = _table_columns(conn, table)
+                names = {n for n, t in aliases.items() if t == table.lower()} | {table.lower()}
+                equality, range_column, sort = _candidate_columns(parse_shape, names, columns, step, sorts)
+                cols = equality + [range_column] if range_column else equality or sort
+                if not cols:
+                    continue
+                indexes = _existing_indexes(conn, table)
+                if any(index_columns[:len(cols)] == cols for _, index_columns in indexes):
+                    continue
+
+                if table not in row_counts:
+                    row_counts[table] = _estimated_rows(conn, table)
+                table_rows = row_counts[table]
+
+                # Filas que devolvería cada búsqueda en el índice
+                if equality:
+                    matches = _rows_per_key(conn, table, [columns[c] for c in equality], indexes)
+                else:
+                    matches = table_rows
+                if range_column:
+                    matches *= RANGE_SELECTIVITY
+                elif sort and re.search(r"\blimit\b", parse_shape):
+                    matches = 1  # Con LIMIT el índice evita leer y ordenar toda la tabla
+                if table_rows <= 1 or matches / table_rows > MAX_MATCH_SHARE:
+                    continue
+
+                key = (table, tuple(columns[c] for c in cols))
+                entry = candidates.setdefault(key, {"queries": 0, "saving_ms": 0.0})
+                entry["queries"] += executions
+                entry["saving_ms"] += _estimated_saving(executions, step_ms, table_rows, matches)
+    finally:
+        conn.close()
+
+    suggestions = []
+    for (table, cols), entry in candidates.items():
+        name = "idx_auto_" + "_".join([table] + list(cols))
+        suggestions.append({
+            "table": table,
+            "columns": list(cols),
+            "queries": entry["queries"],
+            "saving_ms": entry["saving_ms"],
+            "sql": "CREATE INDEX IF NOT EXISTS {} ON {} ({})".format(
+                quote_identifier(name), quote_identifier(table), ", ".join(quote_identifier(c) for c in cols)
+            ),
+        })
+    suggestions.sort(key=lambda s: s["saving_ms"], reverse=True)
+    return suggestions[:limit]
+
+
+def apply_indexes(db_path: str, suggestions: list) -> list:
+    """Crea los índices sugeridos y actualiza con ANALYZE las estadísticas de sus tablas"""
+    if not suggestions:
+        return []
+    conn = sqlite3.connect(db_path)
+    try:
+        for suggestion in suggestions:
+            conn.execute(suggestion["sql"])
+        for table in {suggestion["table"] for suggestion in suggestions}:
+            conn.execute(f"ANALYZE {quote_identifier(table)}")
+        conn.commit()
+    finally:
+        conn.close()
+    return [suggestion["sql"] for suggestion in suggestions]
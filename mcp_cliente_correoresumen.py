@@ -1,32 +1,50 @@
 #!/usr/bin/env python3
+from __future__ import annotations
+
 import asyncio
+import threading
 from dataclasses import dataclass, field
-from typing import Union, cast
-import chromadb
-from chromadb.config import Settings
+from typing import TYPE_CHECKING, Any, Union, cast
 import uuid
 from datetime import datetime
 
-import anthropic
-from anthropic.types import MessageParam, TextBlock, ToolUnionParam, ToolUseBlock
 from dotenv import load_dotenv
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
 
-from conectar_gmail import GmailSender
-from resumenmensaje import generar_resumen
+if TYPE_CHECKING:
+    import anthropic
+    from anthropic.types import MessageParam, TextBlock, ToolUnionParam, ToolUseBlock
+    from mcp import ClientSession
 
 
 load_dotenv()
 
-anthropic_client = anthropic.AsyncAnthropic()
+# Los subsistemas pesados (Anthropic, ChromaDB, Gmail, resumidor) se importan
+# e inicializan bajo demanda para que el arranque del cliente sea inmediato.
+_anthropic_client: anthropic.AsyncAnthropic | None = None
+_anthropic_client_lock = threading.Lock()
+
+
+def get_anthropic_client() -> anthropic.AsyncAnthropic:
+    """Devuelve el cliente asíncrono de Anthropic, creándolo en el primer uso"""
+    global _anthropic_client
+    if _anthropic_client is None:
+        with _anthropic_client_lock:
+            if _anthropic_client is None:
+                import anthropic
+
+                _anthropic_client = anthropic.AsyncAnthropic()
+    return _anthropic_client
+
 
-# Create server parameters for stdio connection
-server_params = StdioServerParameters(
-    command="python",  # Executable
-    args=["./mcp_server.py"],  # Optional command line arguments
-    env=None,  # Optional environment variables
-)
+def get_server_params():
+    """Parámetros de conexión stdio con el servidor MCP"""
+    from mcp import StdioServerParameters
+
+    return StdioServerParameters(
+        command="python",  # Executable
+        args=["./mcp_server.py"],  # Optional command line arguments
+        env=None,  # Optional environment variables
+    )
 
 @dataclass
 class Chat:
@@ -38,30 +56,69 @@ class Chat:
     Debes responder siempre en español y ser claro y conciso en tus explicaciones."""
 
     def __post_init__(self):
-        # Inicializar ChromaDB
-        self.chroma_client = chromadb.Client(Settings(
-            persist_directory="./chroma_db",
-            anonymized_telemetry=False
-        ))
-        self.collection = self.chroma_client.get_or_create_collection(
-            name=f"mcp_prompts_{self.session_id}",
-            metadata={"description": f"Prompts de la sesión MCP {self.session_id}"}
+        # ChromaDB se inicializa en el primer uso (o en segundo plano con warmup)
+        self._collection: Any = None
+        self._collection_lock = threading.Lock()
+
+    @property
+    def collection(self):
+        """Colección de ChromaDB de la sesión, creada en el primer acceso.
+
+        Al crearla se guarda el prompt del sistema, de modo que siempre es el primero.
+        """
+        if self._collection is None:
+            with self._collection_lock:
+                if self._collection is None:
+                    import chromadb
+                    from chromadb.config import Settings
+
+                    self.chroma_client = chromadb.Client(Settings(
+                        persist_directory="./chroma_db",
+                        anonymized_telemetry=False
+                    ))
+                    collection = self.chroma_client.get_or_create_collection(
+                        name=f"mcp_prompts_{self.session_id}",
+                        metadata={"description": f"Prompts de la sesión MCP {self.session_id}"}
+                    )
+                    self._add_prompt(collection, "system", self.system_prompt)
+                    self._collection = collection
+        return self._collection
+
+    def warmup(self) -> threading.Thread:
+        """Precarga en segundo plano los subsistemas pesados mientras el usuario escribe"""
+        thread = threading.Thread(target=self._warmup, name="chat-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def _warmup(self):
+        try:
+            self.collection
+            get_anthropic_client()
+            # Solo se importan los módulos: la autenticación de Gmail puede
+            # requerir interacción y se deja para el envío del resumen.
+            import conectar_gmail  # noqa: F401
+            import resumenmensaje  # noqa: F401
+        except Exception:
+            # Sin mensajes: el usuario está escribiendo y se reintenta en el primer uso
+            pass
+
+    def _add_prompt(self, collection, role: str, content: str):
+        metadata = {
+            'session_id': self.session_id,
+            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'role': role
+        }
+
+        collection.add(
+            documents=[content],
+            metadatas=[metadata],
+            ids=[str(uuid.uuid4())]
         )
 
     async def _save_prompt(self, role: str, content: str):
         """Guarda un prompt en ChromaDB"""
         try:
-            metadata = {
-                'session_id': self.session_id,
-                'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                'role': role
-            }
-            
-            self.collection.add(
-                documents=[content],
-                metadatas=[metadata],
-                ids=[str(uuid.uuid4())]
-            )
+            self._add_prompt(self.collection, role, content)
         except Exception as e:
             print(f"Error al guardar prompt: {str(e)}")
 
@@ -97,6 +154,9 @@ class Chat:
                     summary += f"\n[{prompt['timestamp']}]\n{prompt['content']}\n"
             
             summary += "\n=== FIN DEL RESUMEN ===\n"
+            from conectar_gmail import GmailSender
+            from resumenmensaje import generar_resumen
+
             # Crear instancia
             sender = GmailSender()
             # Enviar mensaje
@@ -128,7 +188,7 @@ class Chat:
         ]
 
         # Initial Claude API call
-        res = await anthropic_client.messages.create(
+        res = await get_anthropic_client().messages.create(
             model="claude-3-5-sonnet-latest",
             system=self.system_prompt,
             max_tokens=8000,
@@ -167,7 +227,7 @@ class Chat:
                     }
                 )
                 # Get next response from Claude
-                res = await anthropic_client.messages.create(
+                res = await get_anthropic_client().messages.create(
                     model="claude-3-7-sonnet-latest",
                     max_tokens=8000,
                     messages=self.messages,
@@ -191,24 +251,23 @@ class Chat:
                 await self.process_query(session, query)
                 break
                 
-            self.messages.append(
-                MessageParam(
-                    role="user",
-                    content=query,
-                )
-            )
+            self.messages.append({"role": "user", "content": query})
 
             await self.process_query(session, query)
 
     async def run(self):
-        async with stdio_client(server_params) as (read, write):
+        from mcp import ClientSession
+        from mcp.client.stdio import stdio_client
+
+        self.warmup()
+        async with stdio_client(get_server_params()) as (read, write):
             async with ClientSession(read, write) as session:
                 # Initialize the connection
                 await session.initialize()
-                # Guardar el prompt del sistema
-                await self._save_prompt("system", self.system_prompt)
+                # El prompt del sistema se guarda al crear la colección (en la precarga)
                 await self.chat_loop(session)
 
-chat = Chat()
+if __name__ == "__main__":
+    chat = Chat()
 
-asyncio.run(chat.run())
+    asyncio.run(chat.run())
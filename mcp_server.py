@@ -4,9 +4,18 @@ import os
 from loguru import logger
 from mcp.server.fastmcp import FastMCP
 from typing import List, Dict, Any
+import csv
+import io
 import json
 import sys
 import signal
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import index_advisor
+from sql_utils import quote_identifier
 
 # Configurar logger
 logger.remove()  # Remover el logger por defecto
@@ -29,6 +38,41 @@ mcp = FastMCP("SQLiteServer")
 
 # Asegurarse de que la base de datos existe
 DB_PATH = os.path.join(os.path.dirname(__file__), "resources/database.db")
+# Las herramientas masivas solo leen y escriben ficheros dentro de estos directorios
+IMPORT_DIR = os.path.join(os.path.dirname(__file__), "resources/imports")
+EXPORT_DIR = os.path.join(os.path.dirname(__file__), "resources/exports")
+WORKLOAD_DB_PATH = os.path.join(os.path.dirname(__file__), "resources/workload.db")
+
+# Modo automático del asesor de índices (opcional): cada AUTO_INDEX_INTERVAL consultas
+# registradas crea los índices sugeridos con un ahorro estimado suficiente y ejecuta ANALYZE
+def _env_number(name: str, default, minimum):
+    """Lee un número de una variable de entorno; si no es válido usa el valor por defecto"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        number = type(default)(value)
+        if number >= minimum:
+            return number
+    except ValueError:
+        pass
+    logger.warning(f"Invalid value for {name}: {value!r}, using {default}")
+    return default
+
+AUTO_INDEX = os.getenv("MCP_AUTO_INDEX", "0") == "1"
+AUTO_INDEX_INTERVAL = _env_number("MCP_AUTO_INDEX_INTERVAL", 20, 1)
+AUTO_INDEX_MIN_SAVING_MS = _env_number("MCP_AUTO_INDEX_MIN_SAVING_MS", 50.0, 0)
+
+# Tamaño de lote para importaciones y exportaciones masivas
+BATCH_SIZE = 1000
+
+# Pragmas para carga masiva (solo afectan a la conexión): la carga va en una única
+# transacción, así que basta con synchronous NORMAL y el modo de journal por defecto
+BULK_PRAGMAS = [
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -64000",
+]
 if not os.path.exists(DB_PATH):
     conn = sqlite3.connect(DB_PATH)
     # Crear una tabla de ejemplo
@@ -50,6 +94,50 @@ if not os.path.exists(DB_PATH):
     conn.close()
     logger.info(f"Created new database with example table at {DB_PATH}")
 
+index_advisor.init_workload_db(WORKLOAD_DB_PATH)
+_recorded_queries = 0
+_auto_index_lock = threading.Lock()
+
+def _explain_query(conn: sqlite3.Connection, sql: str):
+    """Obtiene el plan de la consulta para el asesor de índices, o None si no aplica"""
+    if not sql.strip().upper().startswith(index_advisor.PLANNED_STATEMENTS):
+        return None
+    try:
+        return index_advisor.explain_query(conn, sql)
+    except Exception as e:
+        logger.debug(f"Could not explain query: {str(e)}")
+        return None
+
+def _record_workload(sql: str, plan, elapsed_ms: float):
+    """Registra la consulta en la carga de trabajo sin afectar a la respuesta"""
+    global _recorded_queries
+    if plan is None:
+        return
+    try:
+        index_advisor.record_query(WORKLOAD_DB_PATH, sql, plan, elapsed_ms)
+        _recorded_queries += 1
+        if AUTO_INDEX and _recorded_queries % AUTO_INDEX_INTERVAL == 0:
+            # Crear índices recorre tablas enteras: se hace fuera de la petición
+            threading.Thread(target=_auto_index, name="auto-index", daemon=True).start()
+    except Exception as e:
+        logger.warning(f"Error recording query workload: {str(e)}")
+
+def _auto_index():
+    """Crea en segundo plano los índices sugeridos con ahorro suficiente"""
+    if not _auto_index_lock.acquire(blocking=False):
+        return  # Ya hay una creación de índices en curso
+    try:
+        suggestions = [
+            s for s in index_advisor.suggest_indexes(DB_PATH, WORKLOAD_DB_PATH)
+            if s["saving_ms"] >= AUTO_INDEX_MIN_SAVING_MS
+        ]
+        for created in index_advisor.apply_indexes(DB_PATH, suggestions):
+            logger.info(f"Auto index created: {created}")
+    except Exception as e:
+        logger.warning(f"Error creating automatic indexes: {str(e)}")
+    finally:
+        _auto_index_lock.release()
+
 @mcp.tool()
 def query_data(sql: str) -> str:
     """Ejecuta consultas SQL de forma segura y devuelve los resultados formateados"""
@@ -59,11 +147,14 @@ def query_data(sql: str) -> str:
 
     try:
         cursor = conn.cursor()
+        plan = _explain_query(conn, sql)
+        start = time.perf_counter()
         cursor.execute(sql)
         
         # Si es un SELECT, obtener los resultados
         if sql.strip().upper().startswith("SELECT"):
             results = cursor.fetchall()
+            _record_workload(sql, plan, (time.perf_counter() - start) * 1000)
             if not results:
                 return "La consulta no devolvió resultados."
             
@@ -82,6 +173,7 @@ def query_data(sql: str) -> str:
         else:
             # Para INSERT, UPDATE, DELETE, etc.
             conn.commit()
+            _record_workload(sql, plan, (time.perf_counter() - start) * 1000)
             affected = cursor.rowcount
             return f"Operación ejecutada con éxito. Filas afectadas: {affected}"
             
@@ -139,6 +231,216 @@ def describe_table(table_name: str) -> str:
     finally:
         conn.close()
 
+def _resolve_path(file_path: str, base_dir: str) -> str:
+    """Resuelve una ruta relativa a base_dir y rechaza las que salen de ese directorio"""
+    base = os.path.realpath(base_dir)
+    path = os.path.realpath(os.path.join(base, file_path))
+    if os.path.commonpath([base, path]) != base:
+        raise ValueError(f"La ruta debe estar dentro de {base}")
+    return path
+
+def _read_rows(stream, format: str):
+    """Devuelve (columnas, iterador de filas) a partir de un flujo CSV/JSONL"""
+    if format == "csv":
+        reader = csv.reader(stream)
+        columns = next(reader, None)
+        if not columns:
+            raise ValueError("El CSV no tiene fila de encabezados")
+
+        def rows():
+            for row in reader:
+                if row:
+                    yield [value if value != "" else None for value in row]
+        return columns, rows()
+
+    if format == "jsonl":
+        lines = ((number, line) for number, line in enumerate(stream, 1) if line.strip())
+
+        def parse(number, line):
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError(f"Línea {number}: se esperaba un objeto JSON")
+            return record
+
+        first = next(lines, None)
+        if first is None:
+            raise ValueError("El JSONL no contiene filas")
+        first_record = parse(*first)
+        columns = list(first_record.keys())
+
+        def rows():
+            yield [first_record.get(column) for column in columns]
+            for number, line in lines:
+                record = parse(number, line)
+                unknown = set(record) - set(columns)
+                if unknown:
+                    raise ValueError(
+                        f"Línea {number}: claves que no están en la primera fila: {', '.join(sorted(unknown))}"
+                    )
+                yield [record.get(column) for column in columns]
+        return columns, rows()
+
+    raise ValueError(f"Formato no soportado: {format}. Use 'csv' o 'jsonl'")
+
+@mcp.tool()
+def bulk_insert(table_name: str, data: str = "", file_path: str = "", format: str = "csv") -> str:
+    """Inserta muchas filas en una tabla en una sola transacción.
+
+    Las filas se leen de `data` (texto) o de `file_path` (fichero dentro de
+    resources/imports) en formato 'csv' (con encabezados) o 'jsonl' (un objeto por
+    línea; todas las filas deben usar las claves de la primera).
+    """
+    logger.info(f"Bulk insert into {table_name} ({format}, file={file_path or '-'})")
+    if not data and not file_path:
+        return "Error en la carga masiva: indique 'data' o 'file_path'"
+
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
+    stream = None
+
+    try:
+        if file_path:
+            stream = open(_resolve_path(file_path, IMPORT_DIR), newline="", encoding="utf-8")
+        else:
+            stream = io.StringIO(data)
+        columns, rows = _read_rows(stream, format.lower())
+        sql = "INSERT INTO {} ({}) VALUES ({})".format(
+            quote_identifier(table_name),
+            ", ".join(quote_identifier(column) for column in columns),
+            ", ".join("?" for _ in columns),
+        )
+
+        cursor = conn.cursor()
+        for pragma in BULK_PRAGMAS:
+            cursor.execute(pragma)
+
+        inserted = 0
+        cursor.execute("BEGIN")
+        try:
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= BATCH_SIZE:
+                    cursor.executemany(sql, batch)
+                    inserted += len(batch)
+                    batch = []
+            if batch:
+                cursor.executemany(sql, batch)
+                inserted += len(batch)
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+
+        return f"Carga masiva completada. Filas insertadas en '{table_name}': {inserted}"
+    except Exception as e:
+        logger.error(f"Error in bulk insert: {str(e)}")
+        return f"Error en la carga masiva: {str(e)}"
+    finally:
+        if stream:
+            stream.close()
+        conn.close()
+
+@mcp.tool()
+def export_query(sql: str, format: str = "csv", file_path: str = "") -> str:
+    """Exporta el resultado de un SELECT a un fichero y devuelve solo la ruta y el número de filas.
+
+    Formatos: 'csv', 'jsonl' (un objeto por fila) o 'columnar' (JSONL por bloques de
+    filas, cada línea un objeto columna -> lista de valores, al estilo de los row groups de Parquet).
+    El fichero se crea dentro de resources/exports y nunca sobrescribe uno existente.
+    """
+    logger.info(f"Exporting query ({format}): {sql}")
+    format = format.lower()
+    extensions = {"csv": "csv", "jsonl": "jsonl", "columnar": "columnar.jsonl"}
+    if format not in extensions:
+        return f"Error en la exportación: formato no soportado: {format}. Use 'csv', 'jsonl' o 'columnar'"
+    if not sql.strip().upper().startswith(("SELECT", "WITH")):
+        return "Error en la exportación: solo se pueden exportar consultas SELECT"
+
+    try:
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        if not file_path:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+            file_path = f"export_{timestamp}.{extensions[format]}"
+        file_path = _resolve_path(file_path, EXPORT_DIR)
+        if os.path.exists(file_path):
+            return f"Error en la exportación: el fichero ya existe: {file_path}"
+    except Exception as e:
+        return f"Error en la exportación: {str(e)}"
+
+    conn = sqlite3.connect(DB_PATH)
+    # Solo lectura: un WITH ... DELETE no abre transacción implícita y se confirmaría
+    conn.execute("PRAGMA query_only = ON")
+    tmp_path = None
+
+    try:
+        cursor = conn.cursor()
+        cursor.execute(sql)
+        if cursor.description is None:
+            return "Error en la exportación: la consulta no devuelve filas"
+        columns = [description[0] for description in cursor.description]
+
+        # Se escribe en un temporal y se publica solo si la exportación termina bien
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path), suffix=".tmp")
+        exported = 0
+        with open(fd, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f) if format == "csv" else None
+            if writer:
+                writer.writerow(columns)
+
+            while True:
+                batch = cursor.fetchmany(BATCH_SIZE)
+                if not batch:
+                    break
+                if format == "csv":
+                    writer.writerows(batch)
+                elif format == "jsonl":
+                    for row in batch:
+                        f.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=str) + "\n")
+                else:
+                    group = {column: [row[i] for row in batch] for i, column in enumerate(columns)}
+                    f.write(json.dumps(group, ensure_ascii=False, default=str) + "\n")
+                exported += len(batch)
+
+        # link falla si el destino ya existe, así que nunca se sobrescribe un fichero
+        os.link(tmp_path, file_path)
+        return f"Exportación completada. Fichero: {file_path}. Filas exportadas: {exported}"
+    except Exception as e:
+        logger.error(f"Error exporting query: {str(e)}")
+        return f"Error en la exportación: {str(e)}"
+    finally:
+        conn.close()
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+@mcp.tool()
+def suggest_indexes(limit: int = 10, apply: bool = False) -> str:
+    """Sugiere índices a partir de las consultas registradas, ordenados por ahorro estimado.
+
+    Con apply=True crea los índices sugeridos y ejecuta ANALYZE.
+    """
+    logger.info(f"Suggesting indexes (limit={limit}, apply={apply})")
+
+    try:
+        suggestions = index_advisor.suggest_indexes(DB_PATH, WORKLOAD_DB_PATH, limit)
+        if not suggestions:
+            return "No hay índices que sugerir para la carga de trabajo registrada."
+
+        output = ["Tabla | Columnas | Consultas | Ahorro estimado (ms) | SQL"]
+        output.append("-" * 60)
+        for s in suggestions:
+            output.append(
+                f"{s['table']} | {', '.join(s['columns'])} | {s['queries']} | {s['saving_ms']:.2f} | {s['sql']}"
+            )
+
+        if apply:
+            created = index_advisor.apply_indexes(DB_PATH, suggestions)
+            output.append(f"\nÍndices creados: {len(created)}. Estadísticas actualizadas con ANALYZE.")
+
+        return "\n".join(output)
+    except Exception as e:
+        logger.error(f"Error suggesting indexes: {str(e)}")
+        return f"Error al sugerir índices: {str(e)}"
+
 @mcp.prompt()
 def example_prompt(code: str) -> str:
     return f"Please review this code:\n\n{code}"
@@ -8,8 +8,16 @@ import asyncio
 # Cargar variables de entorno
 load_dotenv()
 
-# Inicializar cliente de Anthropic
-anthropic_client = anthropic.Anthropic()
+# El cliente de Anthropic se crea en el primer resumen, no al importar el módulo
+_anthropic_client = None
+
+
+def get_anthropic_client() -> anthropic.Anthropic:
+    """Devuelve el cliente de Anthropic, creándolo en el primer uso"""
+    global _anthropic_client
+    if _anthropic_client is None:
+        _anthropic_client = anthropic.Anthropic()
+    return _anthropic_client
 
 async def generar_resumen(texto: str) -> str:
     """
@@ -36,7 +44,7 @@ async def generar_resumen(texto: str) -> str:
         Resumen:"""
 
         # Generar el resumen usando Claude
-        response = anthropic_client.messages.create(
+        response = get_anthropic_client().messages.create(
             model="claude-3-opus-20240229",
             max_tokens=1000,
             temperature=0.7,
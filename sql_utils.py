@@ -0,0 +1,7 @@
+#!/usr/bin/env python3
+"""Utilidades SQL compartidas por el servidor MCP y el asesor de índices."""
+
+
+def quote_identifier(name: str) -> str:
+    """Escapa un nombre de tabla, columna o índice para usarlo en SQL"""
+    return '"' + name.replace('"', '""') + '"'